@@ -1,177 +1,198 @@
-import random
-from typing import Dict, List, Tuple
-from game import GameState
-from utils import action_to_str
+import numpy as np
+from typing import Dict, Iterator
+from game import (GameState, compute_valid_actions, decode_action, enumerate_hands, info_set_bid,
+                  info_set_to_str, sample_hand_ids, valid_action_count)
+from utils import StrategyRow, action_to_str, rows_to_strategy, write_strategy_rows
+
+# Number of deals whose hand ids are drawn at once
+DEAL_CHUNK = 4096
 
 class CFRNode:
     def __init__(self, num_actions: int):
-        self.regret_sum = [0.0] * num_actions
-        self.strategy_sum = [0.0] * num_actions
+        self.regret_sum = np.zeros(num_actions)
+        self.strategy_sum = np.zeros(num_actions)
         self.num_actions = num_actions
 
-    def get_strategy(self, realization_weight: float) -> List[float]:
+    def get_current_strategy(self) -> np.ndarray:
+        """Returns the current strategy using Regret Matching."""
+        strategy = np.maximum(self.regret_sum, 0.0)
+        normalizing_sum = strategy.sum()
+        if normalizing_sum > 0:
+            strategy /= normalizing_sum
+        else:
+            strategy.fill(1.0 / self.num_actions)
+        return strategy
+
+    def get_strategy(self, realization_weight: float) -> np.ndarray:
         """
         Returns the current strategy using Regret Matching.
         Also updates strategy_sum for the average strategy.
         """
-        strategy = [0.0] * self.num_actions
-        normalizing_sum = 0.0
-        
-        for i in range(self.num_actions):
-            strategy[i] = max(self.regret_sum[i], 0)
-            normalizing_sum += strategy[i]
-
-        for i in range(self.num_actions):
-            if normalizing_sum > 0:
-                strategy[i] /= normalizing_sum
-            else:
-                strategy[i] = 1.0 / self.num_actions
-            
-            self.strategy_sum[i] += realization_weight * strategy[i]
-            
+        strategy = self.get_current_strategy()
+        self.strategy_sum += realization_weight * strategy
         return strategy
 
-    def get_average_strategy(self) -> List[float]:
-        avg_strategy = [0.0] * self.num_actions
-        normalizing_sum = sum(self.strategy_sum)
-        
-        for i in range(self.num_actions):
-            if normalizing_sum > 0:
-                avg_strategy[i] = self.strategy_sum[i] / normalizing_sum
-            else:
-                avg_strategy[i] = 1.0 / self.num_actions
-        
-        return avg_strategy
+    def get_average_strategy(self) -> np.ndarray:
+        normalizing_sum = self.strategy_sum.sum()
+        if normalizing_sum > 0:
+            return self.strategy_sum / normalizing_sum
+        return np.full(self.num_actions, 1.0 / self.num_actions)
 
 class CFRTrainer:
     def __init__(self, n_dice_p1: int, n_dice_p2: int):
         self.n_dice_p1 = n_dice_p1
         self.n_dice_p2 = n_dice_p2
-        self.nodes: Dict[str, CFRNode] = {} # Map InfoSet -> CFRNode
+        self.total_dice = n_dice_p1 + n_dice_p2
+        self.nodes: Dict[int, CFRNode] = {} # Map InfoSet key -> CFRNode
+
+        # Every sorted hand, its face counts and its cumulative roll probability
+        self.hands_p1, self.face_count_p1, probs_p1 = enumerate_hands(n_dice_p1)
+        self.hands_p2, self.face_count_p2, probs_p2 = enumerate_hands(n_dice_p2)
+        self.cdf_p1 = np.cumsum(probs_p1)
+        self.cdf_p2 = np.cumsum(probs_p2)
+        self.rng = np.random.default_rng()
+        self._deal_buf = [] # Pre-drawn hand id pairs, refilled DEAL_CHUNK at a time
+        self._deal_pos = 0
+        # Every bid is valid at the root, which is visited once per iteration
+        self._opening_actions = compute_valid_actions(None, self.total_dice)
 
     def train(self, iterations: int):
-        """Runs MCCFR for a specified number of iterations."""
+        """
+        Runs External-Sampling MCCFR for a specified number of iterations.
+        Dice are rolled once per iteration and the traverser alternates between players.
+        """
         print(f"Starting training for {self.n_dice_p1}v{self.n_dice_p2} with {iterations} iterations...")
         for i in range(iterations):
             if i % 1000 == 0:
                 print(f"Iteration {i}/{iterations}")
             
-            game = GameState(self.n_dice_p1, self.n_dice_p2)
-            self.cfr(game, 1.0, 1.0)
+            game = self.deal()
+            self.cfr_es(game, i % 2)
+
+    def deal(self) -> GameState:
+        """Samples a hand id for each player and returns a new game with those hands."""
+        if self._deal_pos == len(self._deal_buf):
+            self._refill_deals()
+        h1, h2 = self._deal_buf[self._deal_pos]
+        self._deal_pos += 1
+
+        game = GameState(self.n_dice_p1, self.n_dice_p2, roll=False)
+        game.hand_p1 = self.hands_p1[h1]
+        game.hand_p2 = self.hands_p2[h2]
+        game.hand_ids = (h1, h2)
+        return game
 
-    def cfr(self, game: GameState, p0_weight: float, p1_weight: float) -> float:
+    def _refill_deals(self):
+        """Draws the hand ids for the next DEAL_CHUNK deals in one vectorized call per player."""
+        h1 = sample_hand_ids(self.cdf_p1, self.rng.random(DEAL_CHUNK))
+        h2 = sample_hand_ids(self.cdf_p2, self.rng.random(DEAL_CHUNK))
+        # Plain ints are faster to index with than numpy scalars
+        self._deal_buf = np.stack((h1, h2), axis=1).tolist()
+        self._deal_pos = 0
+
+    def get_payoff(self, hand_id_p1: int, hand_id_p2: int, bid_q: int, bid_f: int) -> float:
+        """Payoff for the challenger of bid (bid_q, bid_f). Same as GameState.get_payoff."""
+        if self.face_count_p1[hand_id_p1, bid_f] + self.face_count_p2[hand_id_p2, bid_f] < bid_q:
+            return 1.0
+        return -1.0
+
+    def cfr_es(self, game: GameState, traverser: int) -> float:
         """
-        Recursive CFR function.
-        Returns the utility for the current player.
+        External-Sampling MCCFR.
+        Every action of the traverser is explored, while the opponent samples a
+        single action from its current strategy. Regrets are only updated at the
+        traverser's nodes; the opponent's nodes accumulate the average strategy.
+        The game must have been dealt by deal(), since payoffs are looked up by its hand_ids.
+        Returns the utility for the traverser.
         """
-        # Get valid actions first to check if terminal
-        # Note: In our game logic, we check terminal status via return value of apply_action
-        # But here we need to know if we CAN move.
-        # Actually, apply_action returns True if the move *caused* termination (Challenge).
-        # So we are at a node. If the previous move was a challenge, we wouldn't be here (handled in loop).
-        # Wait, the structure of recursion is:
-        # 1. Check if terminal (not possible at start of function with current GameState structure, 
-        #    because GameState doesn't store "Game Over" flag, it just returns it from apply_action).
-        #    BUT, we can check if the last action was a challenge? No, GameState history stores it.
-        #    Let's rely on the loop below.
-        
-        # Actually, standard CFR recursion:
-        # We are at a node. We need to choose an action.
-        
+        if game.hand_ids is None:
+            raise ValueError("cfr_es needs a game dealt by deal()")
+
         player = game.current_player
-        valid_actions = game.get_valid_actions()
+        bid = game.current_bid
+        num_actions = valid_action_count(bid, self.total_dice)
         
-        # If no valid actions (shouldn't happen in Liar's Dice unless limits reached), return 0
-        if not valid_actions:
+        if num_actions == 0:
             return 0.0
 
-        info_set = game.get_information_set()
-        node = self.get_node(info_set, len(valid_actions))
-        
-        strategy = node.get_strategy(p0_weight if player == 0 else p1_weight)
-        util = [0.0] * len(valid_actions)
-        node_util = 0.0
+        info_set = game.get_information_set_key()
+        node = self.get_node(info_set, num_actions)
+
+        if player != traverser:
+            strategy = node.get_strategy(1.0)
+            sampled = np.searchsorted(np.cumsum(strategy), self.rng.random(), side='right')
+            sampled = min(int(sampled), num_actions - 1)
+            action = self._opening_actions[sampled] if bid is None else decode_action(sampled, bid)
+            if action == (-1, -1):
+                # The opponent challenged, get_payoff is from its point of view.
+                return -self.get_payoff(*game.hand_ids, *bid)
+
+            game.current_bid = action
+            game.current_player ^= 1
+            game.history_len += 1
+
+            util = self.cfr_es(game, traverser)
+
+            game.current_bid = bid
+            game.current_player = player
+            game.history_len -= 1
+            return util
+
+        strategy = node.get_current_strategy()
+        util = np.empty(num_actions)
         
-        for i, action in enumerate(valid_actions):
-            # Clone game state for recursion (or backtrack, but cloning is safer for Python prototype)
-            # Since GameState is small, we can just create a new one and copy fields.
-            # Or better, make GameState copyable.
-            # For now, let's just manually copy relevant fields.
-            next_game = GameState(game.dice_p1, game.dice_p2)
-            next_game.hand_p1 = game.hand_p1[:]
-            next_game.hand_p2 = game.hand_p2[:]
-            next_game.current_bid = game.current_bid
-            next_game.history = game.history[:]
-            next_game.current_player = game.current_player
-            
-            is_terminal = next_game.apply_action(action)
-            
-            if is_terminal:
-                # If terminal, get payoff for the player who made the move (current_player)
-                # get_payoff returns value for the challenger.
-                # Since we just made the move 'action', we are the challenger.
-                # The payoff is for US.
-                util[i] = next_game.get_payoff()
-            else:
-                # Recursion
-                if player == 0:
-                    util[i] = -self.cfr(next_game, p0_weight * strategy[i], p1_weight)
-                else:
-                    util[i] = -self.cfr(next_game, p0_weight, p1_weight * strategy[i])
-            
-            node_util += strategy[i] * util[i]
-            
-        # Regret Update
-        for i in range(len(valid_actions)):
-            regret = util[i] - node_util
-            if player == 0:
-                node.regret_sum[i] += p1_weight * regret
+        for i in range(num_actions):
+            action = self._opening_actions[i] if bid is None else decode_action(i, bid)
+            if action == (-1, -1):
+                util[i] = self.get_payoff(*game.hand_ids, *bid)
             else:
-                node.regret_sum[i] += p0_weight * regret
-                
+                game.current_bid = action
+                game.current_player ^= 1
+                game.history_len += 1
+
+                util[i] = self.cfr_es(game, traverser)
+
+                game.current_bid = bid
+                game.current_player = player
+                game.history_len -= 1
+
+        node_util = float(strategy @ util)
+        node.regret_sum += util - node_util
+
         return node_util
 
-    def get_node(self, info_set: str, num_actions: int) -> CFRNode:
-        if info_set not in self.nodes:
-            self.nodes[info_set] = CFRNode(num_actions)
-        return self.nodes[info_set]
+    def get_node(self, info_set: int, num_actions: int) -> CFRNode:
+        # (bid, history length, hand id) could index nodes densely, as layout.build_layout
+        # does for the compiled trainers. The dict is kept here because it only holds the
+        # info sets actually visited and is keyed the way iter_strategy_rows exports them.
+        node = self.nodes.get(info_set)
+        if node is None:
+            node = CFRNode(num_actions)
+            self.nodes[info_set] = node
+        return node
 
-    def get_final_strategy(self) -> Dict[str, Dict[str, float]]:
+    def iter_strategy_rows(self) -> Iterator[StrategyRow]:
         """
-        Converts the learned nodes into a clean dictionary for export.
+        Yields (InfoSet, Action, Probability) for the average strategy of every node.
+        Negligible probabilities are dropped here, so they are never materialized.
         """
-        strategy_table = {}
-        # We need to know the actions for each info_set to map back to strings.
-        # This is a bit tricky since CFRNode only stores counts.
-        # We can reconstruct valid actions from the info_set string?
-        # InfoSet: "Hand|Bid|Count"
-        # We can parse this, create a dummy GameState, and get_valid_actions.
-        
+        # CFRNode only stores counts, but the bid packed in the info set key
+        # determines the valid actions, decoded the same way as in cfr_es().
         for info_set, node in self.nodes.items():
             avg_strat = node.get_average_strategy()
+            bid = info_set_bid(info_set)
+            info_set_str = info_set_to_str(info_set)
             
-            # Reconstruct actions
-            parts = info_set.split('|')
-            # hand_str = parts[0]
-            bid_str = parts[1]
-            # count_str = parts[2]
-            
-            # Create dummy game to get actions
-            # We only need current_bid to determine valid actions
-            dummy_game = GameState(self.n_dice_p1, self.n_dice_p2)
-            if bid_str != "None":
-                b_parts = bid_str.split('-')
-                dummy_game.current_bid = (int(b_parts[0]), int(b_parts[1]))
-            else:
-                dummy_game.current_bid = None
-                
-            valid_actions = dummy_game.get_valid_actions()
-            
-            action_probs = {}
-            for i, action in enumerate(valid_actions):
-                if avg_strat[i] > 0.001: # Filter negligible probabilities
-                    action_probs[action_to_str(action)] = avg_strat[i]
-            
-            strategy_table[info_set] = action_probs
-            
-        return strategy_table
+            for i in np.flatnonzero(avg_strat > 0.001): # Filter negligible probabilities
+                yield info_set_str, action_to_str(decode_action(int(i), bid)), float(avg_strat[i])
+
+    def export_strategy(self, filename: str, fmt: str = "csv"):
+        """Writes the average strategy in the given format (CSV is streamed)."""
+        write_strategy_rows(filename, self.iter_strategy_rows(), fmt)
+
+    def get_final_strategy(self) -> Dict[str, Dict[str, float]]:
+        """
+        Converts the learned nodes into a clean dictionary for export.
+        Built fresh on every call; export_strategy streams rows without building it.
+        """
+        return rows_to_strategy(self.iter_strategy_rows())
@@ -0,0 +1,132 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+# Build in place with: cythonize -3 --inplace cfr_core.pyx
+import numpy as np
+
+from libc.stdint cimport uint64_t
+
+import layout
+from game import DICE_FACES, sample_hand_ids
+
+cdef int FACES = DICE_FACES
+
+cdef inline Py_ssize_t bid_state(int b, int history_len) noexcept nogil:
+    """Same as layout.bid_state."""
+    if b < 0:
+        return 0
+    return 1 + b * (b + 1) // 2 + history_len - 1
+
+cdef inline double next_random(uint64_t* state) noexcept nogil:
+    """xorshift64* generator, uniform in [0, 1). Usable without the GIL."""
+    cdef uint64_t x = state[0]
+    x ^= x >> 12
+    x ^= x << 25
+    x ^= x >> 27
+    state[0] = x
+    return ((x * 2685821657736338717ULL) >> 11) * (1.0 / 9007199254740992.0)
+
+cdef inline double challenge_payoff(int h1, int h2, int b,
+                                    const signed char[:, ::1] face_count_p1,
+                                    const signed char[:, ::1] face_count_p2) noexcept nogil:
+    """Payoff for the challenger of bid b."""
+    cdef int q = b // FACES + 1
+    cdef int f = b % FACES + 1
+    if face_count_p1[h1, f] + face_count_p2[h2, f] >= q:
+        return -1.0
+    return 1.0
+
+cdef double cfr_rec(int h1, int h2, int b, int history_len, int traverser, int total_bids,
+                    const signed char[:, ::1] face_count_p1, const signed char[:, ::1] face_count_p2,
+                    const long long[:, ::1] node_offset, double[::1] regret_sum, double[::1] strategy_sum,
+                    uint64_t* rng_state, double* scratch) noexcept nogil:
+    """
+    Compiled equivalent of CFRTrainer.cfr_es, over hand ids and bid indices (see layout.py).
+    scratch holds 2 * total_bids doubles per history length, so every depth of the
+    recursion has its own strategy / util buffers without allocating.
+    Returns the utility for the traverser.
+    """
+    cdef int player = history_len & 1
+    cdef int n = total_bids if b < 0 else total_bids - b
+    cdef Py_ssize_t off = node_offset[bid_state(b, history_len), h1 if player == 0 else h2]
+    cdef double normalizing_sum = 0.0
+    cdef double node_util = 0.0
+    cdef double r
+    cdef int i
+
+    cdef double* strategy = scratch + 2 * total_bids * history_len
+    cdef double* util = strategy + n
+
+    # Regret matching
+    for i in range(n):
+        strategy[i] = regret_sum[off + i] if regret_sum[off + i] > 0 else 0.0
+        normalizing_sum += strategy[i]
+    for i in range(n):
+        if normalizing_sum > 0:
+            strategy[i] /= normalizing_sum
+        else:
+            strategy[i] = 1.0 / n
+
+    if player != traverser:
+        for i in range(n):
+            strategy_sum[off + i] += strategy[i]
+
+        # Sample a single action from the current strategy
+        r = next_random(rng_state)
+        i = 0
+        while i < n - 1 and r >= strategy[i]:
+            r -= strategy[i]
+            i += 1
+
+        if b >= 0 and i == 0:
+            # The opponent challenged, the payoff is from its point of view
+            return -challenge_payoff(h1, h2, b, face_count_p1, face_count_p2)
+        return cfr_rec(h1, h2, i if b < 0 else b + i, history_len + 1, traverser, total_bids,
+                       face_count_p1, face_count_p2, node_offset, regret_sum, strategy_sum, rng_state, scratch)
+
+    for i in range(n):
+        if b >= 0 and i == 0:
+            util[i] = challenge_payoff(h1, h2, b, face_count_p1, face_count_p2)
+        else:
+            util[i] = cfr_rec(h1, h2, i if b < 0 else b + i, history_len + 1, traverser, total_bids,
+                              face_count_p1, face_count_p2, node_offset, regret_sum, strategy_sum, rng_state,
+                              scratch)
+        node_util += strategy[i] * util[i]
+
+    for i in range(n):
+        regret_sum[off + i] += util[i] - node_util
+
+    return node_util
+
+class CythonCFRTrainer(layout.DenseCFRTrainer):
+    """
+    Drop-in replacement for CFRTrainer that runs External-Sampling MCCFR in compiled C.
+    The traversal runs without the GIL, so other Python threads keep running during training.
+    """
+    def __init__(self, n_dice_p1: int, n_dice_p2: int):
+        super().__init__(n_dice_p1, n_dice_p2)
+        self.rng = np.random.default_rng()
+
+    def train(self, iterations: int):
+        """Runs MCCFR for a specified number of iterations, dealing hands 1000 at a time."""
+        cdef const signed char[:, ::1] face_count_p1 = self.face_count_p1
+        cdef const signed char[:, ::1] face_count_p2 = self.face_count_p2
+        cdef const long long[:, ::1] node_offset = self.node_offset
+        cdef double[::1] regret_sum = self.regret_sum
+        cdef double[::1] strategy_sum = self.strategy_sum
+        cdef long long[::1] h1s, h2s
+        cdef uint64_t rng_state = <uint64_t> self.rng.integers(1, 2 ** 63)
+        cdef int total_bids = self.total_bids
+        cdef Py_ssize_t i, it, batch
+        # One strategy / util buffer pair per history length (at most total_bids bids + the opening)
+        cdef double[::1] scratch = np.empty(2 * total_bids * (total_bids + 1))
+
+        print(f"Starting training for {self.n_dice_p1}v{self.n_dice_p2} with {iterations} iterations...")
+        for i in range(0, iterations, 1000):
+            print(f"Iteration {i}/{iterations}")
+            batch = min(1000, iterations - i)
+            h1s = sample_hand_ids(self.cdf_p1, self.rng.random(batch)).astype(np.int64)
+            h2s = sample_hand_ids(self.cdf_p2, self.rng.random(batch)).astype(np.int64)
+            with nogil:
+                for it in range(batch):
+                    cfr_rec(<int> h1s[it], <int> h2s[it], -1, 0, (i + it) % 2, total_bids,
+                            face_count_p1, face_count_p2, node_offset, regret_sum, strategy_sum, &rng_state,
+                            &scratch[0])
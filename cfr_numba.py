@@ -0,0 +1,136 @@
+import numpy as np
+from typing import Optional
+from numba import config, get_num_threads, njit, prange, set_num_threads
+
+import game
+import layout
+
+# Default cap on parallel workers. Each worker holds two private float64 buffers as
+# large as regret_sum (about 76MB each at 5v5), so the default must not scale with cores.
+DEFAULT_MAX_WORKERS = 4
+
+# Compiled versions of the shared layout and hand sampling helpers; see layout.py for the encoding.
+bid_state = njit(cache=True)(layout.bid_state)
+bid_to_action = njit(cache=True)(layout.bid_to_action)
+sample_hand_ids = njit(cache=True)(game.sample_hand_ids)
+
+@njit
+def es_rec(h1, h2, b, history_len, traverser, total_bids, face_count_p1, face_count_p2,
+           node_offset, regret_sum, regret_delta, strategy_delta):
+    """
+    Compiled equivalent of CFRTrainer.cfr_es, over hand ids and bid indices.
+    The current strategy comes from regret_sum plus this worker's pending deltas;
+    updates only go to regret_delta / strategy_delta, so regret_sum is read-only
+    while workers run in parallel.
+    Returns the utility for the traverser.
+    """
+    player = history_len & 1
+    n = total_bids if b < 0 else total_bids - b
+    off = node_offset[bid_state(b, history_len), h1 if player == 0 else h2]
+
+    # Regret matching
+    strategy = np.empty(n)
+    normalizing_sum = 0.0
+    for i in range(n):
+        strategy[i] = max(regret_sum[off + i] + regret_delta[off + i], 0.0)
+        normalizing_sum += strategy[i]
+    for i in range(n):
+        if normalizing_sum > 0:
+            strategy[i] /= normalizing_sum
+        else:
+            strategy[i] = 1.0 / n
+
+    if player != traverser:
+        for i in range(n):
+            strategy_delta[off + i] += strategy[i]
+
+        # Sample a single action from the current strategy
+        r = np.random.random()
+        i = 0
+        while i < n - 1 and r >= strategy[i]:
+            r -= strategy[i]
+            i += 1
+
+        if b >= 0 and i == 0:
+            q, f = bid_to_action(b)
+            count = face_count_p1[h1, f] + face_count_p2[h2, f]
+            # The opponent challenged: it loses if the bid was correct
+            return 1.0 if count >= q else -1.0
+        return es_rec(h1, h2, i if b < 0 else b + i, history_len + 1, traverser, total_bids,
+                      face_count_p1, face_count_p2, node_offset,
+                      regret_sum, regret_delta, strategy_delta)
+
+    util = np.empty(n)
+    node_util = 0.0
+    for i in range(n):
+        if b >= 0 and i == 0:
+            q, f = bid_to_action(b)
+            count = face_count_p1[h1, f] + face_count_p2[h2, f]
+            util[i] = -1.0 if count >= q else 1.0
+        else:
+            util[i] = es_rec(h1, h2, i if b < 0 else b + i, history_len + 1, traverser, total_bids,
+                             face_count_p1, face_count_p2, node_offset,
+                             regret_sum, regret_delta, strategy_delta)
+        node_util += strategy[i] * util[i]
+
+    for i in range(n):
+        regret_delta[off + i] += util[i] - node_util
+
+    return node_util
+
+@njit(parallel=True)
+def run_batch(iterations, total_bids, cdf_p1, cdf_p2, face_count_p1, face_count_p2, node_offset,
+              regret_sum, strategy_sum, regret_buf, strategy_buf, seed):
+    """
+    Runs a batch of MCCFR iterations split across workers (one row of the buffers each).
+    Every worker accumulates into its own buffer, and the buffers are reduced into
+    regret_sum / strategy_sum once the whole batch is done.
+    With seed >= 0, worker w reseeds its thread's generator with seed + w, so results
+    don't depend on which thread runs which worker.
+    """
+    n_workers = regret_buf.shape[0]
+    for w in prange(n_workers):
+        if seed >= 0:
+            np.random.seed(seed + w)
+        regret_buf[w, :] = 0.0
+        strategy_buf[w, :] = 0.0
+        for it in range(w, iterations, n_workers):
+            h1 = sample_hand_ids(cdf_p1, np.random.random())
+            h2 = sample_hand_ids(cdf_p2, np.random.random())
+            es_rec(h1, h2, -1, 0, it % 2, total_bids, face_count_p1, face_count_p2,
+                   node_offset, regret_sum, regret_buf[w], strategy_buf[w])
+
+    for j in prange(regret_sum.shape[0]):
+        for w in range(n_workers):
+            regret_sum[j] += regret_buf[w, j]
+            strategy_sum[j] += strategy_buf[w, j]
+
+class NumbaCFRTrainer(layout.DenseCFRTrainer):
+    """
+    Drop-in replacement for CFRTrainer that runs External-Sampling MCCFR in a
+    Numba kernel, with iterations spread over parallel workers.
+    Memory use is (2 + 2 * n_workers) float64 arrays of one entry per info set action;
+    n_workers defaults to the number of Numba threads, capped at DEFAULT_MAX_WORKERS.
+    """
+    def __init__(self, n_dice_p1: int, n_dice_p2: int, n_workers: Optional[int] = None,
+                 seed: Optional[int] = None):
+        super().__init__(n_dice_p1, n_dice_p2)
+        self.n_workers = n_workers or min(get_num_threads(), DEFAULT_MAX_WORKERS)
+        # Draws a fresh base seed for every batch when training should be reproducible
+        self.seed_rng = np.random.default_rng(seed) if seed is not None else None
+        self.regret_buf = np.empty((self.n_workers, self.regret_sum.shape[0]))
+        self.strategy_buf = np.empty((self.n_workers, self.regret_sum.shape[0]))
+
+    def train(self, iterations: int):
+        """Runs MCCFR for a specified number of iterations, 1000 per parallel batch."""
+        # Also caps the threads used by the buffer reduction, e.g. n_workers=1 inside a process pool
+        set_num_threads(min(self.n_workers, config.NUMBA_NUM_THREADS))
+        array_mb = self.regret_sum.nbytes / 1e6
+        print(f"Starting training for {self.n_dice_p1}v{self.n_dice_p2} with {iterations} iterations "
+              f"on {self.n_workers} workers ({(2 + 2 * self.n_workers) * array_mb:.0f}MB of arrays)...")
+        for i in range(0, iterations, 1000):
+            print(f"Iteration {i}/{iterations}")
+            run_batch(min(1000, iterations - i), self.total_bids, self.cdf_p1, self.cdf_p2,
+                      self.face_count_p1, self.face_count_p2, self.node_offset,
+                      self.regret_sum, self.strategy_sum, self.regret_buf, self.strategy_buf,
+                      int(self.seed_rng.integers(2 ** 31)) if self.seed_rng is not None else -1)
@@ -1,43 +1,104 @@
+import itertools
+import math
 import random
-from typing import List, Tuple, Optional
+import numpy as np
+from typing import Dict, List, Tuple, Optional
 
 # Constants
 DICE_FACES = 6
 
-class GameState:
-    def __init__(self, dice_p1: int, dice_p2: int):
-        self.dice_p1 = dice_p1
-        self.dice_p2 = dice_p2
-        self.hand_p1 = []
-        self.hand_p2 = []
-        self.current_bid = None  # (quantity, face)
-        self.history = [] # List of bids
-        self.current_player = 0 # 0 for P1, 1 for P2
-        self.roll_dice()
+# Default generator for games that are not given one. For a handful of dice the stdlib
+# generator is faster than a numpy draw, whose per-call overhead dominates.
+_RNG = random.Random()
 
-    def roll_dice(self):
-        self.hand_p1 = sorted([random.randint(1, DICE_FACES) for _ in range(self.dice_p1)])
-        self.hand_p2 = sorted([random.randint(1, DICE_FACES) for _ in range(self.dice_p2)])
+# Faces to draw dice from
+_FACES = tuple(range(1, DICE_FACES + 1))
 
-    def get_valid_actions(self) -> List[Tuple[int, int]]:
-        """
-        Returns a list of valid actions.
-        Action format: (quantity, face)
-        Special action: (-1, -1) represents 'Challenge' (Liar)
-        """
-        actions = []
-        
-        # If no bid has been made, any valid bid is allowed.
-        if self.current_bid is None:
-            total_dice = self.dice_p1 + self.dice_p2
-            for q in range(1, total_dice + 1):
-                for f in range(1, DICE_FACES + 1):
-                    actions.append((q, f))
-            return actions
+# Valid actions are fully determined by the current bid and the total dice count.
+# Key: (bid quantity, bid face, total dice), with (0, 0) standing for "no bid yet".
+_ACTIONS_CACHE: Dict[Tuple[int, int, int], Tuple[Tuple[int, int], ...]] = {}
+
+# Information set key layout (int):
+#   bit 0       : player to act
+#   bits 1-8    : history length (number of bids so far)
+#   bits 9-11   : bid face (0 when no bid has been made)
+#   bits 12-19  : bid quantity (0 when no bid has been made)
+#   bits 20+    : sorted hand, 3 bits per die (first die in the lowest bits)
+HISTORY_SHIFT = 1
+BID_F_SHIFT = 9
+BID_Q_SHIFT = 12
+HAND_SHIFT = 20
+
+def pack_hand(hand: Tuple[int, ...]) -> int:
+    """Packs a sorted hand into the hand bits of an info set key."""
+    key = 0
+    for i, d in enumerate(hand):
+        key |= int(d) << (HAND_SHIFT + 3 * i)
+    return key
 
-        curr_q, curr_f = self.current_bid
-        total_dice = self.dice_p1 + self.dice_p2
+def info_set_bid(key: int) -> Optional[Tuple[int, int]]:
+    """Extracts the current bid from an info set key (None if no bid has been made)."""
+    bid_q = (key >> BID_Q_SHIFT) & 0xFF
+    if bid_q == 0:
+        return None
+    return (bid_q, (key >> BID_F_SHIFT) & 0b111)
 
+def info_set_to_str(key: int) -> str:
+    """Converts an info set key to the 'Hand|Bid|Count' string used for export."""
+    hand = []
+    bits = key >> HAND_SHIFT
+    while bits:
+        hand.append(str(bits & 0b111))
+        bits >>= 3
+
+    bid = info_set_bid(key)
+    bid_str = f"{bid[0]}-{bid[1]}" if bid else "None"
+    history_len = (key >> HISTORY_SHIFT) & 0xFF
+    return f"{''.join(hand)}|{bid_str}|{history_len}"
+
+def valid_action_count(current_bid: Optional[Tuple[int, int]], total_dice: int) -> int:
+    """Number of valid actions after current_bid. Same as len(GameState.get_valid_actions())."""
+    if current_bid is None:
+        return total_dice * DICE_FACES
+    curr_q, curr_f = current_bid
+    return 1 + (DICE_FACES - curr_f) + (total_dice - curr_q) * DICE_FACES
+
+def decode_action(i: int, current_bid: Optional[Tuple[int, int]]) -> Tuple[int, int]:
+    """
+    Returns the i-th valid action after current_bid, in get_valid_actions order.
+    Index 0 is Challenge once a bid has been made; every higher bid is valid,
+    so the remaining indices count up through bids in (quantity, face) order.
+    """
+    if current_bid is None:
+        return (i // DICE_FACES + 1, i % DICE_FACES + 1)
+    if i == 0:
+        return (-1, -1)
+    curr_q, curr_f = current_bid
+    b = (curr_q - 1) * DICE_FACES + (curr_f - 1) + i
+    return (b // DICE_FACES + 1, b % DICE_FACES + 1)
+
+def compute_valid_actions(current_bid: Optional[Tuple[int, int]], total_dice: int) -> Tuple[Tuple[int, int], ...]:
+    """
+    Returns the valid actions after current_bid, without needing a GameState.
+    Action format: (quantity, face)
+    Special action: (-1, -1) represents 'Challenge' (Liar)
+    The tuple is shared between calls and must not be modified.
+    """
+    curr_q, curr_f = current_bid if current_bid is not None else (0, 0)
+    key = (curr_q, curr_f, total_dice)
+
+    actions = _ACTIONS_CACHE.get(key)
+    if actions is not None:
+        return actions
+
+    actions = []
+    
+    # If no bid has been made, any valid bid is allowed.
+    if current_bid is None:
+        for q in range(1, total_dice + 1):
+            for f in range(1, DICE_FACES + 1):
+                actions.append((q, f))
+    else:
         # 1. Challenge is always valid after the first bid
         actions.append((-1, -1))
 
@@ -49,8 +110,97 @@ class GameState:
         for q in range(curr_q + 1, total_dice + 1):
             for f in range(1, DICE_FACES + 1):
                 actions.append((q, f))
+    
+    actions = tuple(actions)
+    _ACTIONS_CACHE[key] = actions
+    return actions
+
+def enumerate_hands(n_dice: int) -> Tuple[List[Tuple[int, ...]], np.ndarray, np.ndarray]:
+    """
+    Enumerates every sorted hand of n_dice dice.
+    Returns (hands, face_counts, probs) where face_counts[h, f] is the number of
+    dice showing face f in hand h and probs[h] is the probability of rolling hand h.
+    """
+    hands = list(itertools.combinations_with_replacement(range(1, DICE_FACES + 1), n_dice))
+    face_counts = np.zeros((len(hands), DICE_FACES + 1), dtype=np.int8)
+    probs = np.empty(len(hands))
+    
+    for h, hand in enumerate(hands):
+        for d in hand:
+            face_counts[h, d] += 1
+        # Number of orderings of this multiset of dice
+        orderings = math.factorial(n_dice)
+        for c in face_counts[h]:
+            orderings //= math.factorial(int(c))
+        probs[h] = orderings / DICE_FACES ** n_dice
         
-        return actions
+    return hands, face_counts, probs
+
+def sample_hand_ids(cdf: np.ndarray, u):
+    """
+    Maps uniform draws u in [0, 1) (a float or an array) to hand ids, given the
+    cumulative hand probabilities. Clamped in case rounding leaves cdf[-1] below 1.
+    """
+    return np.minimum(np.searchsorted(cdf, u, side='right'), cdf.shape[0] - 1)
+
+class GameState:
+    def __init__(self, dice_p1: int, dice_p2: int, roll: bool = True,
+                 rng: Optional[random.Random] = None):
+        self.dice_p1 = dice_p1
+        self.dice_p2 = dice_p2
+        self.hand_p1 = ()
+        self.hand_p2 = ()
+        self.hand_ids = None # (P1, P2) ids into enumerate_hands tables, set by CFRTrainer.deal
+        self.current_bid = None  # (quantity, face)
+        self._bid_str_for = None # Bid that _bid_str was built for
+        self._bid_str = "None"
+        self.history = [] # List of bids
+        self.history_len = 0 # Number of bids made so far
+        self.current_player = 0 # 0 for P1, 1 for P2
+        if roll:
+            self.roll_dice(rng)
+
+    def roll_dice(self, rng: Optional[random.Random] = None):
+        """Rolls both hands as sorted tuples, drawing all dice in one call."""
+        dice = (rng or _RNG).choices(_FACES, k=self.dice_p1 + self.dice_p2)
+        self.hand_p1 = sorted(dice[:self.dice_p1])
+        self.hand_p2 = sorted(dice[self.dice_p1:])
+
+    # Hands are stored as tuples, so they can only change by assignment. The setters
+    # reset the per-face counts, hand string and packed hand bits, which get_payoff /
+    # get_information_set / get_information_set_key build on first use and reuse afterwards.
+    @property
+    def hand_p1(self) -> Tuple[int, ...]:
+        return self._hand_p1
+
+    @hand_p1.setter
+    def hand_p1(self, hand):
+        self._hand_p1 = tuple(hand)
+        self._face_counts_p1 = None
+        self._hand_str_p1 = None
+        self._hand_key_p1 = None
+        self.hand_ids = None # No longer matches the assigned hands
+
+    @property
+    def hand_p2(self) -> Tuple[int, ...]:
+        return self._hand_p2
+
+    @hand_p2.setter
+    def hand_p2(self, hand):
+        self._hand_p2 = tuple(hand)
+        self._face_counts_p2 = None
+        self._hand_str_p2 = None
+        self._hand_key_p2 = None
+        self.hand_ids = None # No longer matches the assigned hands
+
+    def get_valid_actions(self) -> Tuple[Tuple[int, int], ...]:
+        """
+        Returns a tuple of valid actions.
+        Action format: (quantity, face)
+        Special action: (-1, -1) represents 'Challenge' (Liar)
+        The tuple is shared between calls and must not be modified.
+        """
+        return compute_valid_actions(self.current_bid, self.dice_p1 + self.dice_p2)
 
     def apply_action(self, action: Tuple[int, int]):
         """
@@ -62,6 +212,7 @@ class GameState:
         
         self.current_bid = action
         self.history.append(action)
+        self.history_len += 1
         self.current_player = 1 - self.current_player
         return False
 
@@ -84,11 +235,11 @@ class GameState:
         
         # Count actual dice matching the bid
         # Note: 1s are NOT wild as per requirements
-        count = 0
-        all_dice = self.hand_p1 + self.hand_p2
-        for d in all_dice:
-            if d == bid_f:
-                count += 1
+        if self._face_counts_p1 is None:
+            self._face_counts_p1 = np.bincount(self.hand_p1, minlength=DICE_FACES + 1)
+        if self._face_counts_p2 is None:
+            self._face_counts_p2 = np.bincount(self.hand_p2, minlength=DICE_FACES + 1)
+        count = self._face_counts_p1[bid_f] + self._face_counts_p2[bid_f]
         
         # Bidder wins if count >= bid_q
         bidder_wins = (count >= bid_q)
@@ -108,14 +259,41 @@ class GameState:
         Returns a string representation of the information set for the current player.
         Abstraction: (MyHand, CurrentBid, BidCount)
         """
-        my_hand = self.hand_p1 if self.current_player == 0 else self.hand_p2
-        hand_str = "".join(map(str, my_hand))
+        if self.current_player == 0:
+            if self._hand_str_p1 is None:
+                self._hand_str_p1 = "".join(map(str, self.hand_p1))
+            hand_str = self._hand_str_p1
+        else:
+            if self._hand_str_p2 is None:
+                self._hand_str_p2 = "".join(map(str, self.hand_p2))
+            hand_str = self._hand_str_p2
         
-        bid_str = "None"
-        if self.current_bid:
-            bid_str = f"{self.current_bid[0]}-{self.current_bid[1]}"
+        # The bid string only changes with the bid, so it is rebuilt lazily.
+        # This also covers callers that backtrack by assigning current_bid directly.
+        if self.current_bid != self._bid_str_for:
+            self._bid_str_for = self.current_bid
+            self._bid_str = f"{self.current_bid[0]}-{self.current_bid[1]}" if self.current_bid else "None"
             
         # Bid count is the number of bids made so far
-        count_str = str(len(self.history))
-        
-        return f"{hand_str}|{bid_str}|{count_str}"
+        return f"{hand_str}|{self._bid_str}|{self.history_len}"
+
+    def get_information_set_key(self) -> int:
+        """
+        Returns the information set for the current player packed into an int.
+        Same abstraction as get_information_set; see info_set_to_str for the inverse.
+        """
+        # The packed hand bits are built once per hand, since every CFR visit needs them
+        if self.current_player == 0:
+            if self._hand_key_p1 is None:
+                self._hand_key_p1 = pack_hand(self.hand_p1)
+            key = self._hand_key_p1
+        else:
+            if self._hand_key_p2 is None:
+                self._hand_key_p2 = pack_hand(self.hand_p2)
+            key = self._hand_key_p2
+
+        if self.current_bid:
+            key |= self.current_bid[0] << BID_Q_SHIFT
+            key |= self.current_bid[1] << BID_F_SHIFT
+
+        return key | (self.history_len << HISTORY_SHIFT) | self.current_player
@@ -0,0 +1,122 @@
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Tuple
+from game import DICE_FACES, enumerate_hands
+from utils import StrategyRow, action_to_str, rows_to_strategy, write_strategy_rows
+
+# Bids are encoded as a single index b = (quantity - 1) * DICE_FACES + (face - 1),
+# with -1 meaning no bid has been made. Every bid above the current one is valid,
+# so action i after bid b is Challenge for i == 0 and bid b + i otherwise
+# (and simply bid i at the opening). This matches compute_valid_actions in game.py.
+#
+# Nodes are laid out densely: an info set is (bid state, hand id), where the bid
+# state combines the bid index with the number of bids made so far (which also
+# fixes the player to act). node_offset[state, hand_id] is the start of the node's
+# actions in the flat regret_sum / strategy_sum arrays.
+
+def bid_state(b: int, history_len: int) -> int:
+    """Index of (bid, history_len). After bid b, history_len is in [1, b + 1]."""
+    if b < 0:
+        return 0
+    return 1 + b * (b + 1) // 2 + history_len - 1
+
+def bid_to_action(b: int) -> Tuple[int, int]:
+    """Converts a bid index to (quantity, face)."""
+    return b // DICE_FACES + 1, b % DICE_FACES + 1
+
+def build_layout(n_hands_p1: int, n_hands_p2: int, total_bids: int) -> Tuple[np.ndarray, int]:
+    """
+    Assigns every reachable info set a slice of the flat regret/strategy arrays.
+    Returns (node_offset, total_actions); unreachable entries of node_offset are -1.
+    """
+    n_states = 1 + total_bids * (total_bids + 1) // 2
+    node_offset = np.full((n_states, max(n_hands_p1, n_hands_p2)), -1, dtype=np.int64)
+
+    # Opening: player 0 to act, every bid is valid
+    node_offset[0, :n_hands_p1] = np.arange(n_hands_p1) * total_bids
+    offset = n_hands_p1 * total_bids
+
+    for b in range(total_bids):
+        n_actions = total_bids - b
+        for history_len in range(1, b + 2):
+            n_hands = n_hands_p1 if history_len % 2 == 0 else n_hands_p2
+            node_offset[bid_state(b, history_len), :n_hands] = offset + np.arange(n_hands) * n_actions
+            offset += n_hands * n_actions
+
+    return node_offset, offset
+
+def iter_strategy_rows(hands_p1: List[Tuple[int, ...]], hands_p2: List[Tuple[int, ...]], total_bids: int,
+                       node_offset: np.ndarray, regret_sum: np.ndarray,
+                       strategy_sum: np.ndarray) -> Iterator[StrategyRow]:
+    """
+    Yields the same (InfoSet, Action, Probability) rows as CFRTrainer.iter_strategy_rows
+    from flat regret/strategy arrays. Info sets that were never visited are skipped.
+    """
+    hand_strs = (["".join(map(str, h)) for h in hands_p1],
+                 ["".join(map(str, h)) for h in hands_p2])
+    bid_states = [(-1, 0)] + [(b, l) for b in range(total_bids) for l in range(1, b + 2)]
+
+    for b, history_len in bid_states:
+        n = total_bids if b < 0 else total_bids - b
+        if b < 0:
+            bid_str, actions = "None", [bid_to_action(i) for i in range(n)]
+        else:
+            bid_str = action_to_str(bid_to_action(b))
+            actions = [(-1, -1)] + [bid_to_action(b + i) for i in range(1, n)]
+        action_strs = [action_to_str(a) for a in actions]
+
+        player = history_len % 2
+        for h, hand_str in enumerate(hand_strs[player]):
+            off = node_offset[bid_state(b, history_len), h]
+            node_strategy_sum = strategy_sum[off:off + n]
+            if not (node_strategy_sum.any() or regret_sum[off:off + n].any()):
+                continue
+
+            normalizing_sum = node_strategy_sum.sum()
+            if normalizing_sum > 0:
+                avg_strat = node_strategy_sum / normalizing_sum
+            else:
+                avg_strat = np.full(n, 1.0 / n)
+
+            info_set_str = f"{hand_str}|{bid_str}|{history_len}"
+            for i in np.flatnonzero(avg_strat > 0.001): # Filter negligible probabilities
+                yield info_set_str, action_strs[i], float(avg_strat[i])
+
+class DenseCFRTrainer(ABC):
+    """
+    Shared state and export for the compiled trainers, which keep regrets and
+    strategy sums in flat arrays laid out by build_layout.
+    """
+    def __init__(self, n_dice_p1: int, n_dice_p2: int):
+        self.n_dice_p1 = n_dice_p1
+        self.n_dice_p2 = n_dice_p2
+        self.total_bids = (n_dice_p1 + n_dice_p2) * DICE_FACES
+
+        self.hands_p1, self.face_count_p1, probs_p1 = enumerate_hands(n_dice_p1)
+        self.hands_p2, self.face_count_p2, probs_p2 = enumerate_hands(n_dice_p2)
+        self.cdf_p1 = np.cumsum(probs_p1)
+        self.cdf_p2 = np.cumsum(probs_p2)
+
+        self.node_offset, total_actions = build_layout(len(self.hands_p1), len(self.hands_p2), self.total_bids)
+        self.regret_sum = np.zeros(total_actions)
+        self.strategy_sum = np.zeros(total_actions)
+
+    @abstractmethod
+    def train(self, iterations: int):
+        """Runs MCCFR for a specified number of iterations."""
+
+    def iter_strategy_rows(self) -> Iterator[StrategyRow]:
+        """Yields (InfoSet, Action, Probability) rows; info sets never visited are skipped."""
+        return iter_strategy_rows(self.hands_p1, self.hands_p2, self.total_bids, self.node_offset,
+                                  self.regret_sum, self.strategy_sum)
+
+    def export_strategy(self, filename: str, fmt: str = "csv"):
+        """Writes the average strategy in the given format (CSV is streamed)."""
+        write_strategy_rows(filename, self.iter_strategy_rows(), fmt)
+
+    def get_final_strategy(self) -> Dict[str, Dict[str, float]]:
+        """
+        Converts the learned nodes into a clean dictionary for export.
+        Same format and behaviour as CFRTrainer.get_final_strategy.
+        """
+        return rows_to_strategy(self.iter_strategy_rows())
@@ -0,0 +1,91 @@
+import unittest
+import numpy as np
+from cfr import DEAL_CHUNK, CFRTrainer
+from game import GameState, enumerate_hands
+
+def check_avoids_false_openings(test, strategy):
+    """
+    With 2 dice, opening two of a face P1 doesn't hold is always false and loses
+    to a challenge, so a 1v1 strategy should put little weight on it.
+    """
+    for hand in "123456":
+        false_bids = sum(prob for action, prob in strategy[f"{hand}|None|0"].items()
+                         if action.startswith("2-") and action != f"2-{hand}")
+        test.assertLess(false_bids, 0.1, hand)
+
+class TestCFRTrainer(unittest.TestCase):
+    def test_payoff_matches_game(self):
+        trainer = CFRTrainer(2, 1)
+        for h1, hand_p1 in enumerate(trainer.hands_p1):
+            for h2, hand_p2 in enumerate(trainer.hands_p2):
+                game = GameState(2, 1, roll=False)
+                game.hand_p1 = list(hand_p1)
+                game.hand_p2 = list(hand_p2)
+                for bid in [(1, 2), (2, 5), (3, 6)]:
+                    game.current_bid = bid
+                    self.assertEqual(trainer.get_payoff(h1, h2, *bid), game.get_payoff())
+
+    def test_cfr_es_avoids_false_openings(self):
+        trainer = CFRTrainer(1, 1)
+        trainer.rng = np.random.default_rng(0)
+        trainer.train(3000)
+        check_avoids_false_openings(self, trainer.get_final_strategy())
+
+    def test_cfr_es_scores_the_game_hands(self):
+        trainer = CFRTrainer(1, 1)
+        game = trainer.deal()
+        game.hand_p1 = (3,)
+        game.hand_p2 = (1,)
+        with self.assertRaises(ValueError):
+            trainer.cfr_es(game, 1)
+        game.hand_ids = (trainer.hands_p1.index((3,)), trainer.hands_p2.index((1,)))
+
+        # P2 faces 2-5 holding a 1: Challenge wins, while the only raise (2-6)
+        # gets challenged by P1 and loses.
+        game.current_bid = (2, 5)
+        game.history_len = 1
+        game.current_player = 1
+        self.assertEqual(trainer.cfr_es(game, 1), 0.0)
+        node = trainer.nodes[game.get_information_set_key()]
+        self.assertEqual(node.get_current_strategy().tolist(), [1.0, 0.0])
+
+    def test_final_strategy_follows_training(self):
+        trainer = CFRTrainer(1, 1)
+        self.assertEqual(trainer.get_final_strategy(), {})
+
+        game = trainer.deal()
+        game.current_bid = (2, 5)
+        game.history_len = 1
+        game.current_player = 1
+        trainer.cfr_es(game, 0)
+        # The opponent node visited above now has a strategy sum
+        info_set = f"{game.hand_p2[0]}|2-5|1"
+        self.assertIn(info_set, trainer.get_final_strategy())
+
+        # Each call returns a new table, so callers can't change what the next one sees
+        trainer.get_final_strategy().clear()
+        self.assertIn(info_set, trainer.get_final_strategy())
+
+    def test_deal(self):
+        trainer = CFRTrainer(2, 3)
+        game = trainer.deal()
+        self.assertEqual(game.hand_p1, trainer.hands_p1[game.hand_ids[0]])
+        self.assertEqual(game.hand_p2, trainer.hands_p2[game.hand_ids[1]])
+        self.assertEqual(len(game.hand_p2), 3)
+
+    def test_deal_frequencies(self):
+        trainer = CFRTrainer(1, 2)
+        trainer.rng = np.random.default_rng(0)
+        # More deals than one pre-drawn chunk, so hands keep coming after a refill
+        n_deals = 3 * DEAL_CHUNK + 1
+        counts_p1 = np.zeros(len(trainer.hands_p1))
+        counts_p2 = np.zeros(len(trainer.hands_p2))
+        for _ in range(n_deals):
+            h1, h2 = trainer.deal().hand_ids
+            counts_p1[h1] += 1
+            counts_p2[h2] += 1
+        np.testing.assert_allclose(counts_p1 / n_deals, enumerate_hands(1)[2], atol=0.01)
+        np.testing.assert_allclose(counts_p2 / n_deals, enumerate_hands(2)[2], atol=0.01)
+
+if __name__ == '__main__':
+    unittest.main()
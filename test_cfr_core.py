@@ -0,0 +1,36 @@
+import unittest
+import numpy as np
+from cfr import CFRTrainer
+from test_cfr import check_avoids_false_openings
+from test_cfr_numba import check_strategy_format
+
+# Build with: cythonize -3 --inplace cfr_core.pyx
+try:
+    from cfr_core import CythonCFRTrainer
+except ImportError:
+    CythonCFRTrainer = None
+
+@unittest.skipIf(CythonCFRTrainer is None, "cfr_core extension is not built")
+class TestCythonCFRTrainer(unittest.TestCase):
+    def test_export_matches_python_format(self):
+        python_trainer = CFRTrainer(1, 2)
+        python_trainer.train(200)
+        cython_trainer = CythonCFRTrainer(1, 2)
+        cython_trainer.train(200)
+
+        python_strategy = python_trainer.get_final_strategy()
+        cython_strategy = cython_trainer.get_final_strategy()
+        check_strategy_format(self, python_strategy, 1, 2)
+        check_strategy_format(self, cython_strategy, 1, 2)
+        # P1's opening is visited on every iteration by both trainers
+        self.assertEqual({k for k in cython_strategy if k.endswith("|None|0")},
+                         {k for k in python_strategy if k.endswith("|None|0")})
+
+    def test_avoids_false_openings(self):
+        trainer = CythonCFRTrainer(1, 1)
+        trainer.rng = np.random.default_rng(0)
+        trainer.train(5000)
+        check_avoids_false_openings(self, trainer.get_final_strategy())
+
+if __name__ == '__main__':
+    unittest.main()
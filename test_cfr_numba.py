@@ -0,0 +1,89 @@
+import unittest
+import numpy as np
+from cfr import CFRTrainer
+from game import GameState
+from layout import bid_state
+from test_cfr import check_avoids_false_openings
+from utils import action_to_str
+
+try:
+    from cfr_numba import NumbaCFRTrainer, es_rec
+except ImportError:
+    NumbaCFRTrainer = None
+
+def check_strategy_format(test, strategy, n_dice_p1, n_dice_p2):
+    """Checks every InfoSet is what GameState.get_information_set gives for that state."""
+    for info_set, action_probs in strategy.items():
+        hand, bid, history_len = info_set.split("|")
+        game = GameState(n_dice_p1, n_dice_p2, roll=False)
+        game.history_len = int(history_len)
+        game.current_player = game.history_len % 2
+        if game.current_player == 0:
+            game.hand_p1 = tuple(map(int, hand))
+        else:
+            game.hand_p2 = tuple(map(int, hand))
+        if bid != "None":
+            game.current_bid = tuple(map(int, bid.split("-")))
+        test.assertEqual(game.get_information_set(), info_set)
+        valid = {action_to_str(a) for a in game.get_valid_actions()}
+        test.assertLessEqual(set(action_probs), valid, info_set)
+
+@unittest.skipIf(NumbaCFRTrainer is None, "numba is not installed")
+class TestNumbaCFRTrainer(unittest.TestCase):
+    def test_export_matches_python_format(self):
+        python_trainer = CFRTrainer(1, 2)
+        python_trainer.train(200)
+        numba_trainer = NumbaCFRTrainer(1, 2, n_workers=2)
+        numba_trainer.train(200)
+
+        python_strategy = python_trainer.get_final_strategy()
+        numba_strategy = numba_trainer.get_final_strategy()
+        check_strategy_format(self, python_strategy, 1, 2)
+        check_strategy_format(self, numba_strategy, 1, 2)
+        # P1's opening is visited on every iteration by both trainers
+        self.assertEqual({k for k in numba_strategy if k.endswith("|None|0")},
+                         {k for k in python_strategy if k.endswith("|None|0")})
+
+    def test_avoids_false_openings(self):
+        for n_workers in (1, 2):
+            trainer = NumbaCFRTrainer(1, 1, n_workers=n_workers, seed=0)
+            trainer.train(5000)
+            check_avoids_false_openings(self, trainer.get_final_strategy())
+
+    def test_terminal_utilities_match_python(self):
+        # P1 has bid 2-5 and P2 is to act: P2 either challenges, or raises to 2-6
+        # and gets challenged by P1. Compared for every pair of hands.
+        python_trainer = CFRTrainer(1, 1)
+        numba_trainer = NumbaCFRTrainer(1, 1, n_workers=1)
+        b = (2 - 1) * 6 + (5 - 1)
+        n = numba_trainer.total_bids - b
+        for h1 in range(len(python_trainer.hands_p1)):
+            for h2 in range(len(python_trainer.hands_p2)):
+                game = GameState(1, 1, roll=False)
+                game.hand_p1 = python_trainer.hands_p1[h1]
+                game.hand_p2 = python_trainer.hands_p2[h2]
+                game.hand_ids = (h1, h2)
+                game.current_bid = (2, 5)
+                game.history_len = 1
+                game.current_player = 1
+                off = numba_trainer.node_offset[bid_state(b, 1), h2]
+
+                for traverser in (0, 1):
+                    # P2 challenges for sure when it is the sampled opponent
+                    regret_sum = np.zeros_like(numba_trainer.regret_sum)
+                    regret_sum[off] = 1.0
+                    python_trainer.nodes.clear()
+                    python_trainer.get_node(game.get_information_set_key(), n).regret_sum[:] = regret_sum[off:off + n]
+
+                    regret_delta = np.zeros_like(regret_sum)
+                    numba_util = es_rec(h1, h2, b, 1, traverser, numba_trainer.total_bids,
+                                        numba_trainer.face_count_p1, numba_trainer.face_count_p2,
+                                        numba_trainer.node_offset, regret_sum, regret_delta,
+                                        np.zeros_like(regret_sum))
+                    python_node = python_trainer.nodes[game.get_information_set_key()]
+                    regret_before = python_node.regret_sum.copy()
+                    self.assertEqual(numba_util, python_trainer.cfr_es(game, traverser), (h1, h2, traverser))
+                    np.testing.assert_array_equal(regret_delta[off:off + n], python_node.regret_sum - regret_before)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
-from game import GameState
+from game import (GameState, compute_valid_actions, decode_action, enumerate_hands, info_set_bid, info_set_to_str,
+                  valid_action_count)
 
 class TestGameState(unittest.TestCase):
     def test_initial_state(self):
@@ -9,6 +10,18 @@ class TestGameState(unittest.TestCase):
         self.assertIsNone(game.current_bid)
         self.assertEqual(game.current_player, 0)
 
+    def test_no_roll(self):
+        game = GameState(2, 2, roll=False)
+        self.assertEqual(game.hand_p1, ())
+        self.assertEqual(game.hand_p2, ())
+
+    def test_history_len(self):
+        game = GameState(1, 1)
+        game.apply_action((1, 3))
+        game.apply_action((1, 5))
+        self.assertEqual(game.history_len, 2)
+        self.assertTrue(game.get_information_set().endswith("|1-5|2"))
+
     def test_valid_actions_start(self):
         game = GameState(1, 1)
         actions = game.get_valid_actions()
@@ -34,6 +47,46 @@ class TestGameState(unittest.TestCase):
         self.assertNotIn((1, 2), actions) # Lower face, same quantity
         self.assertNotIn((1, 3), actions) # Same bid
 
+    def test_valid_actions_cached(self):
+        game_a = GameState(1, 1)
+        game_b = GameState(1, 1)
+        game_a.apply_action((1, 3))
+        game_b.apply_action((1, 3))
+        # Same bid and dice count share the same (immutable) tuple.
+        self.assertIs(game_a.get_valid_actions(), game_b.get_valid_actions())
+        self.assertIsInstance(game_a.get_valid_actions(), tuple)
+
+    def test_compute_valid_actions(self):
+        game = GameState(2, 1, roll=False)
+        game.apply_action((2, 3))
+        self.assertEqual(compute_valid_actions((2, 3), 3), game.get_valid_actions())
+        self.assertEqual(len(compute_valid_actions(None, 3)), 3 * 6)
+
+    def test_decode_action(self):
+        game = GameState(2, 1)
+        bids = [None] + [(q, f) for q in range(1, 4) for f in range(1, 7)]
+        for bid in bids:
+            game.current_bid = bid
+            actions = game.get_valid_actions()
+            self.assertEqual(valid_action_count(bid, 3), len(actions))
+            self.assertEqual(tuple(decode_action(i, bid) for i in range(len(actions))), actions)
+
+    def test_information_set_key(self):
+        game = GameState(2, 1)
+        game.hand_p1 = [2, 5]
+        game.hand_p2 = [6]
+        self.assertEqual(info_set_to_str(game.get_information_set_key()), game.get_information_set())
+        self.assertIsNone(info_set_bid(game.get_information_set_key()))
+
+        game.apply_action((2, 4))
+        key = game.get_information_set_key()
+        self.assertEqual(info_set_to_str(key), "6|2-4|1")
+        self.assertEqual(info_set_bid(key), (2, 4))
+
+        # The cached hand bits follow a reassigned hand
+        game.hand_p2 = [3]
+        self.assertEqual(info_set_to_str(game.get_information_set_key()), "3|2-4|1")
+
     def test_challenge_logic(self):
         game = GameState(1, 1)
         # Mock hands for deterministic test
@@ -66,5 +119,30 @@ class TestGameState(unittest.TestCase):
         # P1 lied. Challenger (P2) wins. Payoff +1.
         self.assertEqual(game.get_payoff(), 1.0)
 
+    def test_hands_are_read_only(self):
+        game = GameState(1, 1, roll=False)
+        game.hand_p1 = [2]
+        game.hand_p2 = [5]
+        game.apply_action((1, 6))
+        self.assertEqual(game.get_payoff(), 1.0)
+        with self.assertRaises(TypeError):
+            game.hand_p1[0] = 6
+        # Reassigning the hand updates the counts used by get_payoff
+        game.hand_p1 = [6]
+        self.assertEqual(game.get_payoff(), -1.0)
+
+class TestEnumerateHands(unittest.TestCase):
+    def test_two_dice(self):
+        hands, face_counts, probs = enumerate_hands(2)
+        # 6 doubles + 15 distinct pairs
+        self.assertEqual(len(hands), 21)
+        self.assertAlmostEqual(probs.sum(), 1.0)
+
+        h = hands.index((2, 5))
+        self.assertAlmostEqual(probs[h], 2 / 36)
+        self.assertEqual(face_counts[h, 2], 1)
+        self.assertEqual(face_counts[h, 5], 1)
+        self.assertAlmostEqual(probs[hands.index((3, 3))], 1 / 36)
+
 if __name__ == '__main__':
     unittest.main()
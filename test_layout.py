@@ -0,0 +1,57 @@
+import unittest
+import numpy as np
+from game import DICE_FACES, enumerate_hands
+from layout import bid_state, build_layout, iter_strategy_rows
+
+def reachable_nodes(n_hands_p1, n_hands_p2, total_bids):
+    """Yields (bid_state, hand_id, num_actions) for every info set of the game."""
+    for h in range(n_hands_p1):
+        yield bid_state(-1, 0), h, total_bids
+    for b in range(total_bids):
+        for history_len in range(1, b + 2):
+            n_hands = n_hands_p1 if history_len % 2 == 0 else n_hands_p2
+            for h in range(n_hands):
+                yield bid_state(b, history_len), h, total_bids - b
+
+class TestLayout(unittest.TestCase):
+    def test_bid_states_are_dense(self):
+        total_bids = 3 * DICE_FACES
+        states = [bid_state(-1, 0)] + [bid_state(b, l) for b in range(total_bids) for l in range(1, b + 2)]
+        self.assertEqual(sorted(states), list(range(1 + total_bids * (total_bids + 1) // 2)))
+
+    def test_nodes_cover_flat_arrays_once(self):
+        for n_dice_p1, n_dice_p2 in [(1, 1), (1, 3), (3, 1), (2, 2)]:
+            n_hands_p1 = len(enumerate_hands(n_dice_p1)[0])
+            n_hands_p2 = len(enumerate_hands(n_dice_p2)[0])
+            total_bids = (n_dice_p1 + n_dice_p2) * DICE_FACES
+            node_offset, total_actions = build_layout(n_hands_p1, n_hands_p2, total_bids)
+
+            covered = np.zeros(total_actions, dtype=int)
+            n_nodes = 0
+            for state, h, n in reachable_nodes(n_hands_p1, n_hands_p2, total_bids):
+                off = node_offset[state, h]
+                covered[off:off + n] += 1
+                n_nodes += 1
+            self.assertTrue((covered == 1).all(), (n_dice_p1, n_dice_p2))
+            # Every other entry is unreachable (hand ids past the acting player's hand count)
+            self.assertEqual((node_offset >= 0).sum(), n_nodes)
+
+    def test_iter_strategy_rows(self):
+        hands = enumerate_hands(1)[0]
+        total_bids = 2 * DICE_FACES
+        node_offset, total_actions = build_layout(len(hands), len(hands), total_bids)
+        regret_sum = np.zeros(total_actions)
+        strategy_sum = np.zeros(total_actions)
+
+        # P1 holding a 1 at the opening, and P2 holding a 5 facing 1-3
+        off = node_offset[bid_state(-1, 0), 0]
+        strategy_sum[off:off + 2] = [3.0, 1.0]
+        off = node_offset[bid_state(2, 1), 4]
+        strategy_sum[off] = 1.0
+
+        rows = list(iter_strategy_rows(hands, hands, total_bids, node_offset, regret_sum, strategy_sum))
+        self.assertEqual(rows, [("1|None|0", "1-1", 0.75), ("1|None|0", "1-2", 0.25),
+                                ("5|1-3|1", "Challenge", 1.0)])
+
+if __name__ == '__main__':
+    unittest.main()
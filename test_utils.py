@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from utils import build_sampling_table, get_strategy_filename, load_strategy, sample_action, save_strategy
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+STRATEGY = {
+    "1|None|0": {"1-1": 0.25, "1-6": 0.75},
+    "5|1-3|1": {"Challenge": 0.125, "1-5": 0.875},
+}
+
+class TestStrategyIO(unittest.TestCase):
+    def setUp(self):
+        # Strategy files are read and written in the working directory
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def round_trip(self, fmt):
+        save_strategy(STRATEGY, 1, 1, fmt)
+        self.assertTrue(os.path.exists(get_strategy_filename(1, 1, fmt)))
+        self.assertEqual(load_strategy(1, 1, fmt), STRATEGY)
+
+    def test_csv_round_trip(self):
+        self.round_trip("csv")
+
+    def test_pkl_round_trip(self):
+        self.round_trip("pkl")
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet_round_trip(self):
+        self.round_trip("parquet")
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            save_strategy(STRATEGY, 1, 1, "json")
+        with self.assertRaises(ValueError):
+            load_strategy(1, 1, "json")
+
+class TestSampling(unittest.TestCase):
+    def test_frequencies_follow_probabilities(self):
+        # Exported probabilities drop negligible actions, so they need not sum to 1
+        table = build_sampling_table({"1|None|0": {"1-1": 0.2, "1-6": 0.6}})
+        actions, cumulative_probs = table["1|None|0"]
+        self.assertEqual(actions, [(1, 1), (1, 6)])
+
+        rng = np.random.default_rng(0)
+        draws = [sample_action(actions, cumulative_probs, rng) for _ in range(20000)]
+        self.assertAlmostEqual(draws.count((1, 1)) / len(draws), 0.25, delta=0.02)
+        self.assertAlmostEqual(draws.count((1, 6)) / len(draws), 0.75, delta=0.02)
+
+    def test_single_action(self):
+        table = build_sampling_table({"5|2-6|1": {"Challenge": 0.999}})
+        rng = np.random.default_rng(0)
+        for _ in range(100):
+            self.assertEqual(sample_action(*table["5|2-6|1"], rng), (-1, -1))
+
+if __name__ == '__main__':
+    unittest.main()
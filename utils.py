@@ -1,56 +1,125 @@
 import csv
 import os
-from typing import Dict, Tuple
+import pickle
+from typing import Dict, Iterable, List, Tuple
 
-def get_strategy_filename(n_dice_p1: int, n_dice_p2: int) -> str:
-    """Returns the filename for the strategy table based on dice counts."""
-    return f"strategy_{n_dice_p1}v{n_dice_p2}.csv"
+import numpy as np
 
-def save_strategy(strategy: Dict[str, Dict[str, float]], n_dice_p1: int, n_dice_p2: int):
+# One exported strategy entry: (InfoSet, Action, Probability)
+StrategyRow = Tuple[str, str, float]
+
+# Per info set sampling table: (actions, cumulative probabilities)
+SamplingTable = Dict[str, Tuple[List[Tuple[int, int]], np.ndarray]]
+
+# Supported strategy file formats, also used as the file extension
+STRATEGY_FORMATS = ("csv", "pkl", "parquet")
+
+def get_strategy_filename(n_dice_p1: int, n_dice_p2: int, fmt: str = "csv") -> str:
+    """Returns the filename for the strategy table based on dice counts and file format."""
+    return f"strategy_{n_dice_p1}v{n_dice_p2}.{fmt}"
+
+def check_strategy_format(fmt: str):
+    if fmt not in STRATEGY_FORMATS:
+        raise ValueError(f"Unknown strategy format {fmt!r}, expected one of {STRATEGY_FORMATS}")
+
+def write_strategy_rows(filename: str, rows: Iterable[StrategyRow], fmt: str = "csv"):
     """
-    Saves the strategy table to a CSV file.
+    Writes strategy rows to a file in the given format.
+    CSV is streamed row by row; pickle and parquet need the full table first.
     Format: InfoSet, Action, Probability
     """
-    filename = get_strategy_filename(n_dice_p1, n_dice_p2)
+    check_strategy_format(fmt)
     print(f"Saving strategy to {filename}...")
     
-    with open(filename, mode='w', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow(["InfoSet", "Action", "Probability"])
-        
-        for info_set, actions in strategy.items():
-            for action_str, prob in actions.items():
-                writer.writerow([info_set, action_str, prob])
+    if fmt == "pkl":
+        save_strategy_pkl(filename, rows_to_strategy(rows))
+    elif fmt == "parquet":
+        save_strategy_parquet(filename, rows)
+    else:
+        with open(filename, mode='w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(["InfoSet", "Action", "Probability"])
+            writer.writerows(rows)
     
     print("Save complete.")
 
-def load_strategy(n_dice_p1: int, n_dice_p2: int) -> Dict[str, Dict[str, float]]:
+def save_strategy(strategy: Dict[str, Dict[str, float]], n_dice_p1: int, n_dice_p2: int, fmt: str = "csv"):
     """
-    Loads the strategy table from a CSV file.
-    Returns a dictionary mapping InfoSet -> {Action -> Probability}
+    Saves the strategy table to a file in the given format.
+    Format: InfoSet, Action, Probability
     """
-    filename = get_strategy_filename(n_dice_p1, n_dice_p2)
+    rows = ((info_set, action_str, prob)
+            for info_set, actions in strategy.items()
+            for action_str, prob in actions.items())
+    write_strategy_rows(get_strategy_filename(n_dice_p1, n_dice_p2, fmt), rows, fmt)
+
+def save_strategy_pkl(path: str, strategy: Dict[str, Dict[str, float]]):
+    """Pickles the strategy table as is, so loading needs no parsing."""
+    with open(path, mode='wb') as file:
+        pickle.dump(strategy, file, protocol=5)
+
+def save_strategy_parquet(path: str, rows: Iterable[StrategyRow]):
+    """Writes strategy rows as InfoSet / Action / Probability columns. Requires pyarrow."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    info_sets, actions, probs = [], [], []
+    for info_set, action, prob in rows:
+        info_sets.append(info_set)
+        actions.append(action)
+        probs.append(prob)
+    
+    table = pa.table({"InfoSet": info_sets, "Action": actions, "Probability": probs})
+    pq.write_table(table, path, compression='zstd')
+
+def rows_to_strategy(rows: Iterable[StrategyRow]) -> Dict[str, Dict[str, float]]:
+    """Groups strategy rows into a dictionary mapping InfoSet -> {Action -> Probability}."""
     strategy = {}
+    for info_set, action, prob in rows:
+        if info_set not in strategy:
+            strategy[info_set] = {}
+        strategy[info_set][action] = prob
+    return strategy
+
+def load_strategy(n_dice_p1: int, n_dice_p2: int, fmt: str = "csv") -> Dict[str, Dict[str, float]]:
+    """
+    Loads the strategy table from a file in the given format.
+    Returns a dictionary mapping InfoSet -> {Action -> Probability}
+    """
+    check_strategy_format(fmt)
+    filename = get_strategy_filename(n_dice_p1, n_dice_p2, fmt)
     
     if not os.path.exists(filename):
         print(f"Warning: Strategy file {filename} not found.")
-        return strategy
+        return {}
 
     print(f"Loading strategy from {filename}...")
-    with open(filename, mode='r') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            info_set = row["InfoSet"]
-            action = row["Action"]
-            prob = float(row["Probability"])
-            
-            if info_set not in strategy:
-                strategy[info_set] = {}
-            strategy[info_set][action] = prob
+    if fmt == "pkl":
+        strategy = load_strategy_pkl(filename)
+    elif fmt == "parquet":
+        strategy = load_strategy_parquet(filename)
+    else:
+        strategy = load_strategy_csv(filename)
             
     print("Load complete.")
     return strategy
 
+def load_strategy_csv(path: str) -> Dict[str, Dict[str, float]]:
+    with open(path, mode='r') as file:
+        reader = csv.DictReader(file)
+        return rows_to_strategy((row["InfoSet"], row["Action"], float(row["Probability"])) for row in reader)
+
+def load_strategy_pkl(path: str) -> Dict[str, Dict[str, float]]:
+    with open(path, mode='rb') as file:
+        return pickle.load(file)
+
+def load_strategy_parquet(path: str) -> Dict[str, Dict[str, float]]:
+    """Requires pyarrow."""
+    import pyarrow.parquet as pq
+
+    columns = pq.read_table(path).to_pydict()
+    return rows_to_strategy(zip(columns["InfoSet"], columns["Action"], columns["Probability"]))
+
 def action_to_str(action: Tuple[int, int]) -> str:
     """Converts action tuple to string format 'Q-F' or 'Challenge'."""
     if action == (-1, -1):
@@ -63,3 +132,18 @@ def str_to_action(action_str: str) -> Tuple[int, int]:
         return (-1, -1)
     parts = action_str.split('-')
     return (int(parts[0]), int(parts[1]))
+
+def build_sampling_table(strategy: Dict[str, Dict[str, float]]) -> SamplingTable:
+    """
+    Converts a loaded strategy into parsed actions and cumulative probabilities per info set,
+    so each draw is a single searchsorted. Meant for evaluating many games (e.g. a future batch
+    eval command); for a handful of interactive moves sampling from the dict directly is just as fast.
+    """
+    return {info_set: ([str_to_action(a) for a in action_probs],
+                       np.cumsum(np.fromiter(action_probs.values(), dtype=float, count=len(action_probs))))
+            for info_set, action_probs in strategy.items()}
+
+def sample_action(actions: List[Tuple[int, int]], cumulative_probs: np.ndarray, rng: np.random.Generator) -> Tuple[int, int]:
+    """Samples an action from a sampling table entry. Exported probabilities need not sum to 1."""
+    i = np.searchsorted(cumulative_probs, rng.random() * cumulative_probs[-1], side='right')
+    return actions[min(i, len(actions) - 1)]